@@ -33,7 +33,7 @@ function _bash_pyautoenv_activate() {
     fi
     local pyautoenv_py="${_bash_pyautoenv_path}/pyautoenv.py"
     if [ -f "${pyautoenv_py}" ]; then
-        eval "$(python3 "${pyautoenv_py}")"
+        eval "$(python3 -S "${pyautoenv_py}")"
     fi
 }
 
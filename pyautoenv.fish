@@ -31,7 +31,7 @@ function _pyautoenv_activate --on-variable PWD \
     end
     set _pyautoenv_py "$_pyautoenv_path/pyautoenv.py"
     if test -f "$_pyautoenv_py"
-        eval (python3 "$_pyautoenv_py" --fish)
+        eval (python3 -S "$_pyautoenv_py" --fish)
     end
 end
 
@@ -27,10 +27,18 @@ environments, add the directory's path to the 'PYAUTOENV_IGNORE_DIR'
 environment variable. Paths should be separated using a ';'.
 """
 
+from __future__ import annotations
+
 import os
 import sys
 from functools import lru_cache
-from typing import List, TextIO, Union
+
+# Importing 'typing' also imports 're', which together take longer to
+# import than it takes to run the rest of the script. Annotations are not
+# evaluated at runtime, so only import it when type checking.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import TextIO
 
 __version__ = "0.6.1"
 
@@ -49,11 +57,22 @@ IGNORE_DIRS = "PYAUTOENV_IGNORE_DIR"
 """Directories to ignore and not activate environments within."""
 VENV_NAMES = "PYAUTOENV_VENV_NAME"
 """Directory names to search in for venv virtual environments."""
+POETRY_NAME_TRANSLATION = str.maketrans(dict.fromkeys(' $`!*@"\\\r\n\t', "_"))
+"""Translation table to sanitize a project name for a poetry env name."""
 
 
 class Args:
     """Container for command line arguments."""
 
+    __slots__ = (
+        "directory",
+        "fish",
+        "pwsh",
+        "bin_dir",
+        "venv_script",
+        "poetry_script",
+    )
+
     def __init__(
         self,
         directory: str,
@@ -64,6 +83,22 @@ class Args:
         self.directory = directory
         self.fish = fish
         self.pwsh = pwsh
+        # Work out the activator scripts once, rather than for every
+        # candidate environment directory.
+        op_sys = operating_system()
+        self.bin_dir = "Scripts" if op_sys == Os.WINDOWS else "bin"
+        if fish:
+            self.venv_script = self.poetry_script = "activate.fish"
+        elif pwsh:
+            # In venv environments, and Windows poetry environments, this
+            # activator has an uppercase A. In poetry environments on *NIX
+            # systems, it has a lowercase A.
+            self.venv_script = "Activate.ps1"
+            self.poetry_script = (
+                "Activate.ps1" if op_sys == Os.WINDOWS else "activate.ps1"
+            )
+        else:
+            self.venv_script = self.poetry_script = "activate"
 
 
 class Os:
@@ -74,7 +109,7 @@ class Os:
     WINDOWS = 2
 
 
-def main(sys_args: List[str], stdout: TextIO) -> int:
+def main(sys_args: list[str], stdout: TextIO) -> int:
     """Write commands to activate/deactivate environments."""
     args = parse_args(sys_args, stdout)
     if not os.path.isdir(args.directory):
@@ -84,12 +119,9 @@ def main(sys_args: List[str], stdout: TextIO) -> int:
     if active_env_dir:
         if not new_activator:
             stdout.write("deactivate")
-        elif not activator_in_venv(
-            new_activator,
-            active_env_dir,
-        ) and os.path.isfile(new_activator):
+        elif not activator_in_venv(new_activator, active_env_dir):
             stdout.write(f"deactivate && . {new_activator}")
-    elif new_activator and os.path.isfile(new_activator):
+    elif new_activator:
         stdout.write(f". '{new_activator}'")
     return 0
 
@@ -97,76 +129,97 @@ def main(sys_args: List[str], stdout: TextIO) -> int:
 def activator_in_venv(activator_path: str, venv_dir: str) -> bool:
     """Return True if the given activator is in the given venv directory."""
     activator_venv_dir = os.path.dirname(os.path.dirname(activator_path))
-    return os.path.samefile(activator_venv_dir, venv_dir)
+    # Comparing the normalized paths as strings avoids two 'stat' calls
+    # in the common case. Fall back to comparing the files, in case one
+    # of the paths goes through a symlink.
+    norm_activator_venv_dir = os.path.normcase(
+        os.path.normpath(activator_venv_dir),
+    )
+    if norm_activator_venv_dir == os.path.normcase(os.path.normpath(venv_dir)):
+        return True
+    try:
+        return os.path.samefile(activator_venv_dir, venv_dir)
+    except OSError:
+        return False
 
 
-def parse_args(argv: List[str], stdout: TextIO) -> Args:
+def parse_args(argv: list[str], stdout: TextIO) -> Args:
     """Parse the sequence of command line arguments."""
     # Avoiding argparse gives a good speed boost and the parsing logic
     # is not too complex. We won't get a full 'bells and whistles' CLI
     # experience, but that's fine for our use-case.
-
-    def parse_exit_flag(argv: List[str], flags: List[str]) -> bool:
-        return any(f in argv for f in flags)
-
-    def parse_flag(argv: List[str], flag: str) -> bool:
-        try:
-            argv.pop(argv.index(flag))
-        except ValueError:
-            return False
-        return True
-
-    if parse_exit_flag(argv, ["-h", "--help"]):
-        stdout.write(CLI_HELP)
-        sys.exit(0)
-    if parse_exit_flag(argv, ["-V", "--version"]):
-        stdout.write(f"pyautoenv {__version__}\n")
+    show_help = show_version = fish = pwsh = False
+    positional = []
+
+    # Classify the arguments in a single pass, acting on them afterwards
+    # so the help flag takes precedence wherever it appears.
+    for arg in argv:
+        if arg in {"-h", "--help"}:
+            show_help = True
+        elif arg in {"-V", "--version"}:
+            show_version = True
+        elif arg == "--fish":
+            fish = True
+        elif arg == "--pwsh":
+            pwsh = True
+        elif arg.strip():
+            # ignore empty arguments
+            positional.append(arg)
+    if show_help or show_version:
+        stdout.write(CLI_HELP if show_help else f"pyautoenv {__version__}\n")
         sys.exit(0)
 
-    fish = parse_flag(argv, "--fish")
-    pwsh = parse_flag(argv, "--pwsh")
-    num_activators = sum([fish, pwsh])
-    if num_activators > 1:
-        raise ValueError(
-            f"zero or one activator flag expected, found {num_activators}",
-        )
-    # ignore empty arguments
-    argv = [a for a in argv if a.strip()]
-    if len(argv) > 1:
+    if fish and pwsh:
+        raise ValueError("zero or one activator flag expected, found 2")
+    if len(positional) > 1:
         raise ValueError(
-            f"exactly one positional argument expected, found {len(argv)}",
+            f"exactly one positional argument expected, found {len(positional)}",
         )
-    directory = os.path.abspath(argv[0]) if len(argv) else os.getcwd()
+    directory = os.path.abspath(positional[0]) if positional else os.getcwd()
     return Args(directory=directory, fish=fish, pwsh=pwsh)
 
 
-def discover_env(args: Args) -> Union[str, None]:
-    """Find an environment in the given directory or any of its parents."""
-    while (not dir_is_ignored(args.directory)) and (
-        args.directory != os.path.dirname(args.directory)
-    ):
+def discover_env(args: Args) -> str | None:
+    """
+    Find an environment in the given directory or any of its parents.
+
+    The search does not continue above the user's home directory, as we
+    do not expect to find a project's environment outside of it.
+    """
+    if dir_is_ignored(args.directory):
+        return None
+    home_dir = os.path.normpath(os.path.expanduser("~"))
+    parent_dir = os.path.dirname(args.directory)
+    while args.directory != parent_dir:
         env_dir = get_virtual_env(args)
         if env_dir:
             return env_dir
-        args.directory = os.path.dirname(args.directory)
+        if args.directory == home_dir:
+            break
+        args.directory = parent_dir
+        parent_dir = os.path.dirname(parent_dir)
     return None
 
 
 def dir_is_ignored(directory: str) -> bool:
-    """Return True if the given directory is marked to be ignored."""
-    return any(directory == ignored for ignored in ignored_dirs())
+    """Return True if the given directory, or a parent, is to be ignored."""
+    # The ignored directories end in a separator, so a single
+    # 'startswith' checks for the directory itself and its children.
+    return os.path.join(directory, "").startswith(ignored_dirs())
 
 
-@lru_cache(maxsize=128)
-def ignored_dirs() -> List[str]:
-    """Get the list of directories to not activate an environment within."""
+@lru_cache(maxsize=None)
+def ignored_dirs() -> tuple[str, ...]:
+    """Get the directories to not activate an environment within."""
     dirs = os.environ.get(IGNORE_DIRS, None)
     if dirs:
-        return dirs.split(";")
-    return []
+        return tuple(
+            os.path.join(os.path.normpath(d), "") for d in dirs.split(";") if d
+        )
+    return ()
 
 
-def get_virtual_env(args: Args) -> Union[str, None]:
+def get_virtual_env(args: Args) -> str | None:
     """Return the activator for the venv if defined in the given directory."""
     venv_dir = venv_activator(args)
     if venv_dir:
@@ -176,31 +229,31 @@ def get_virtual_env(args: Args) -> Union[str, None]:
     return None
 
 
-def venv_activator(args: Args) -> Union[str, None]:
+def venv_activator(args: Args) -> str | None:
     """Return the venv activator within the given directory, if it contains a venv."""
     candidate_venv_dirs = venv_candidate_dirs(args)
     for path in candidate_venv_dirs:
-        activate_script = activator(path, args)
+        activate_script = os.path.join(path, args.bin_dir, args.venv_script)
         if os.path.isfile(activate_script):
             return activate_script
     return None
 
 
-def venv_candidate_dirs(args: Args) -> List[str]:
+def venv_candidate_dirs(args: Args) -> list[str]:
     """Get the paths to a list of candidate venvs within the given directory."""
-    candidate_paths = []
-    for venv_name in venv_dir_names():
-        candidate_dir = os.path.join(args.directory, venv_name)
-        candidate_paths.append(candidate_dir)
-    return candidate_paths
+    # Join once to get the directory with a trailing separator, then
+    # concatenate the names; the same trick 'os.walk' uses.
+    directory = os.path.join(args.directory, "")
+    return [directory + venv_name for venv_name in venv_dir_names()]
 
 
-def venv_dir_names() -> List[str]:
+@lru_cache(maxsize=None)
+def venv_dir_names() -> tuple[str, ...]:
     """Get the possible names for a venv directory."""
     name_list = os.environ.get(VENV_NAMES, "")
     if name_list:
-        return [x for x in name_list.split(";") if x]
-    return [".venv"]
+        return tuple(x for x in name_list.split(";") if x)
+    return (".venv",)
 
 
 def has_poetry_env(directory: str) -> bool:
@@ -208,45 +261,54 @@ def has_poetry_env(directory: str) -> bool:
     return os.path.isfile(os.path.join(directory, "poetry.lock"))
 
 
-def poetry_activator(args: Args) -> Union[str, None]:
-    """
-    Return the activator for the venv associated with a poetry project directory.
-
-    If there are multiple poetry environments, pick the one with the
-    latest modification time.
-    """
-    env_list = poetry_env_list(args.directory)
-    if env_list:
-        env_dir = max(env_list, key=lambda p: os.stat(p).st_mtime)
-        return activator(env_dir, args)
+def poetry_activator(args: Args) -> str | None:
+    """Return the activator for the venv associated with a poetry project directory."""
+    env_dir = poetry_env_dir(args.directory)
+    if env_dir is None:
+        return None
+    activate_script = os.path.join(env_dir, args.bin_dir, args.poetry_script)
+    if os.path.isfile(activate_script):
+        return activate_script
     return None
 
 
-def poetry_env_list(directory: str) -> List[str]:
+def poetry_env_dir(directory: str) -> str | None:
     """
-    Return list of poetry environments for the given directory.
+    Return the poetry environment for the given directory.
 
-    This can be found via the poetry CLI using
-    ``poetry env list --full-path``, but it's painfully slow.
+    If there are multiple poetry environments, pick the one with the
+    latest modification time. The list of environments can be found via
+    the poetry CLI using ``poetry env list --full-path``, but it's
+    painfully slow.
     """
     cache_dir = poetry_cache_dir()
     if cache_dir is None:
-        return []
+        return None
     env_name = poetry_env_name(directory)
     if env_name is None:
-        return []
+        return None
+    venvs_dir = os.path.join(cache_dir, "virtualenvs")
+    env_prefix = f"{env_name}-py"
+    env_dir = None
+    latest_mtime = -1
     try:
-        return [
-            f.path
-            for f in os.scandir(os.path.join(cache_dir, "virtualenvs"))
-            if f.name.startswith(f"{env_name}-py")
-        ]
+        with os.scandir(venvs_dir) as entries:
+            for entry in entries:
+                if not entry.name.startswith(env_prefix):
+                    continue
+                # On Windows, the entry's stat comes for free with the
+                # directory listing.
+                mtime = entry.stat().st_mtime_ns
+                if mtime > latest_mtime:
+                    env_dir = entry.path
+                    latest_mtime = mtime
     except OSError:
-        return []
+        return None
+    return env_dir
 
 
-@lru_cache(maxsize=128)
-def poetry_cache_dir() -> Union[str, None]:
+@lru_cache(maxsize=None)
+def poetry_cache_dir() -> str | None:
     """Return the poetry cache directory, or None if it's not found."""
     cache_dir = os.environ.get("POETRY_CACHE_DIR", None)
     if cache_dir and os.path.isdir(cache_dir):
@@ -261,12 +323,11 @@ def poetry_cache_dir() -> Union[str, None]:
     return None
 
 
-def linux_poetry_cache_dir() -> Union[str, None]:
+def linux_poetry_cache_dir() -> str | None:
     """Return the poetry cache directory for Linux."""
-    xdg_cache = os.environ.get(
-        "XDG_CACHE_HOME",
-        os.path.join(os.path.expanduser("~"), ".cache"),
-    )
+    xdg_cache = os.environ.get("XDG_CACHE_HOME", None)
+    if not xdg_cache:
+        xdg_cache = os.path.join(os.path.expanduser("~"), ".cache")
     return os.path.join(xdg_cache, "pypoetry")
 
 
@@ -280,7 +341,7 @@ def macos_poetry_cache_dir() -> str:
     )
 
 
-def windows_poetry_cache_dir() -> Union[str, None]:
+def windows_poetry_cache_dir() -> str | None:
     """Return the poetry cache directory for Windows."""
     app_data = os.environ.get("LOCALAPPDATA", None)
     if not app_data:
@@ -288,7 +349,7 @@ def windows_poetry_cache_dir() -> Union[str, None]:
     return os.path.join(app_data, "pypoetry", "Cache")
 
 
-def poetry_env_name(directory: str) -> Union[str, None]:
+def poetry_env_name(directory: str) -> str | None:
     """
     Get the name of the poetry environment defined in the given directory.
 
@@ -311,87 +372,124 @@ def poetry_env_name(directory: str) -> Union[str, None]:
     if name is None:
         return None
 
-    # These two take roughly the same amount of time to import as it
-    # does to run the rest of the script. Import locally here, so we're
-    # only importing when we know that we need to.
-    import base64
-    import hashlib
-
-    name = name.lower()
-    sanitized_name = (
-        # This is a bit ugly, but it's more performant than using a regex.
-        # The import time for the 're' module is also a factor.
-        name.replace(" ", "_")
-        .replace("$", "_")
-        .replace("`", "_")
-        .replace("!", "_")
-        .replace("*", "_")
-        .replace("@", "_")
-        .replace("\\", "_")
-        .replace("\r", "_")
-        .replace("\n", "_")
-        .replace("\t", "_")
-    )
+    # Import locally here, so we're only importing when we know that we
+    # need to. 'binascii' is a builtin module, unlike 'base64', which
+    # pulls in 're' and takes longer to import than the rest of the
+    # script takes to run.
+    import binascii
+
+    # Translating is more performant than using a regex, and avoids the
+    # import time of the 're' module.
+    sanitized_name = name.lower().translate(POETRY_NAME_TRANSLATION)[:42]
+    # Encoding with 'fsencode' gives the same bytes as poetry's
+    # 'str.encode' for any path poetry can handle, but does not raise on
+    # paths containing undecodable bytes.
     normalized_path = os.path.normcase(os.path.realpath(directory))
-    path_hash = hashlib.sha256(normalized_path.encode()).digest()
-    b64_hash = base64.urlsafe_b64encode(path_hash).decode()[:8]
+    path_bytes = os.fsencode(normalized_path)
+    # Only the first 8 characters of the base64 encoded hash are used.
+    # These come from the first 6 bytes of the hash, which encode to
+    # exactly 8 characters with no padding. Replacing '+' and '/' with
+    # '-' and '_' gives the same result as 'base64.urlsafe_b64encode'.
+    path_hash = sha256_digest(path_bytes)[:6]
+    b64_hash = (
+        binascii.b2a_base64(path_hash, newline=False)
+        .replace(b"+", b"-")
+        .replace(b"/", b"_")
+        .decode("ascii")
+    )
     return f"{sanitized_name}-{b64_hash}"
 
 
-def poetry_project_name(directory: str) -> Union[str, None]:
-    """Parse the poetry project name from the given directory."""
+def sha256_digest(data: bytes) -> bytes:
+    """
+    Return the SHA256 digest of the given data.
+
+    The 'hashlib' module loads OpenSSL, which takes longer to import than
+    the rest of the script takes to run. Use CPython's builtin
+    implementation where it's available, as it's much cheaper to import.
+    """
+    try:
+        # Python < 3.12
+        from _sha256 import sha256 as sha256_impl
+    except ImportError:
+        try:
+            from _sha2 import sha256 as sha256_impl
+        except ImportError:
+            from hashlib import sha256 as sha256_impl
+    return sha256_impl(data).digest()
+
+
+def poetry_project_name(directory: str) -> str | None:
+    """
+    Parse the poetry project name from the given directory.
+
+    The name is read from the '[project]' table of the 'pyproject.toml'
+    file, falling back to the '[tool.poetry]' table used before poetry
+    supported PEP 621 project metadata.
+    """
     pyproject_file_path = os.path.join(directory, "pyproject.toml")
     try:
-        with open(pyproject_file_path, encoding="utf-8") as pyproject_file:
-            pyproject_lines = pyproject_file.readlines()
+        with open(pyproject_file_path, "rb") as pyproject_file:
+            pyproject = pyproject_file.read()
     except OSError:
         return None
-    # Ideally we'd use a proper TOML parser to do this, but there isn't
-    # one available in the standard library until Python 3.11. This
-    # hacked together parser should work for the vast majority of cases.
-    in_tool_poetry_section = False
-    for line in pyproject_lines:
-        if line.strip() == "[tool.poetry]":
-            in_tool_poetry_section = True
-            continue
-        if line.strip().startswith("["):
-            in_tool_poetry_section = False
-        if not in_tool_poetry_section:
-            continue
+    for table in (b"[project]", b"[tool.poetry]"):
+        name = toml_table_name(pyproject, table)
+        if name is not None:
+            return name
+    return None
+
+
+def toml_table_name(toml: bytes, table: bytes) -> str | None:
+    """
+    Parse the value of the 'name' key within a table of a TOML document.
+
+    Ideally we'd use a proper TOML parser to do this, but there isn't one
+    available in the standard library until Python 3.11. This hacked
+    together parser should work for the vast majority of cases.
+    """
+    line_start = toml_table_start(toml, table)
+    if line_start < 0:
+        return None
+    # Walk the lines by index, rather than splitting the rest of the
+    # document, as the name is usually near the top of the table.
+    while line_start < len(toml):
+        line_end = toml.find(b"\n", line_start)
+        if line_end < 0:
+            line_end = len(toml)
+        line = toml[line_start:line_end]
+        line_start = line_end + 1
+        if line.strip().startswith(b"["):
+            return None
         try:
-            key, val = (part.strip().strip('"') for part in line.split("="))
+            key, val = (part.strip().strip(b'"') for part in line.split(b"="))
         except ValueError:
             continue
-        if key == "name":
-            return val
+        if key == b"name":
+            return val.decode()
     return None
 
 
-def activator(env_directory: str, args: Args) -> str:
-    """Get the activator script for the environment in the given directory."""
-    dir_name = "Scripts" if operating_system() == Os.WINDOWS else "bin"
-    if args.fish:
-        script = "activate.fish"
-    elif args.pwsh:
-        poetry_dir = poetry_cache_dir()
-        if (
-            poetry_dir is not None
-            and env_directory.startswith(poetry_dir)
-            and operating_system() != Os.WINDOWS
-        ):
-            # In poetry environments on *NIX systems, this activator has a lowercase A.
-            script = "activate.ps1"
-        else:
-            # In venv environments, and Windows poetry environments, this activator has
-            # an uppercase A.
-            script = "Activate.ps1"
-    else:
-        script = "activate"
-    return os.path.join(env_directory, dir_name, f"{script}")
-
+def toml_table_start(toml: bytes, table: bytes) -> int:
+    """
+    Return the index of the line after a table's header in a TOML document.
 
-@lru_cache(maxsize=128)
-def operating_system() -> Union[int, None]:
+    Return -1 if the document does not contain the table.
+    """
+    header_start = toml.find(table)
+    while header_start >= 0:
+        line_start = toml.rfind(b"\n", 0, header_start) + 1
+        line_end = toml.find(b"\n", header_start)
+        if line_end < 0:
+            line_end = len(toml)
+        if toml[line_start:line_end].strip() == table:
+            return line_end + 1
+        header_start = toml.find(table, line_end)
+    return -1
+
+
+@lru_cache(maxsize=None)
+def operating_system() -> int | None:
     """
     Return the operating system the script's being run on.
 
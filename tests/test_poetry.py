@@ -14,8 +14,8 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import abc
-import copy
 import os
+import sys
 from io import StringIO
 from pathlib import Path
 from typing import Dict
@@ -87,15 +87,24 @@ class PoetryTester(abc.ABC):
         fs.create_file(self.venv_dir / "Scripts" / "Activate.ps1")
         return fs
 
+    @classmethod
+    def setup_class(cls):
+        cls.os_patch = mock.patch(OPERATING_SYSTEM, return_value=cls.os)
+        cls.os_patch.start()
+
     def setup_method(self):
         pyautoenv.poetry_cache_dir.cache_clear()
         pyautoenv.ignored_dirs.cache_clear()
-        self.os_patch = mock.patch(OPERATING_SYSTEM, return_value=self.os)
-        self.os_patch.start()
-        os.environ = copy.deepcopy(self.env)  # noqa: B003
+        pyautoenv.venv_dir_names.cache_clear()
+        self.env_patch = mock.patch.dict(os.environ, self.env, clear=True)
+        self.env_patch.start()
 
     def teardown_method(self):
-        self.os_patch.stop()
+        self.env_patch.stop()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.os_patch.stop()
 
     def test_activates_given_poetry_dir(self):
         stdout = StringIO()
@@ -165,6 +174,29 @@ class PoetryTester(abc.ABC):
         assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
         assert not stdout.getvalue()
 
+    def test_activates_once_activate_script_is_created(self, fs):
+        stdout = StringIO()
+        # poetry creates the env directory before the activate script
+        fs.remove(self.venv_dir / self.activator)
+        assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
+        assert not stdout.getvalue()
+
+        fs.create_file(self.venv_dir / self.activator)
+
+        assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
+        assert stdout.getvalue() == f". '{self.venv_dir / self.activator}'"
+
+    def test_deactivate_given_active_and_activate_script_is_not_file(
+        self,
+        fs,
+    ):
+        stdout = StringIO()
+        activate_venv(self.venv_dir)
+        fs.remove(self.venv_dir / self.activator)
+
+        assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
+        assert stdout.getvalue() == "deactivate"
+
     def test_nothing_happens_given_poetry_cache_dir_does_not_exist(self, fs):
         stdout = StringIO()
         fs.remove_object(str(self.venv_dir))
@@ -205,6 +237,36 @@ class PoetryTester(abc.ABC):
         assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
         assert not stdout.getvalue()
 
+    def test_activates_latest_env_given_multiple_envs(self, fs):
+        stdout = StringIO()
+        env_prefix = self.venv_dir.name.rsplit("-py", 1)[0]
+        old_env = self.poetry_cache / f"{env_prefix}-py2.6"
+        new_env = self.poetry_cache / f"{env_prefix}-py2.7"
+        fs.remove_object(str(self.venv_dir))
+        fs.create_file(old_env / self.activator)
+        fs.create_file(new_env / self.activator)
+        os.utime(old_env, (1, 1))
+
+        assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
+        assert stdout.getvalue() == f". '{new_env / self.activator}'"
+
+    def test_activates_latest_env_over_env_for_current_python_version(
+        self,
+        fs,
+    ):
+        stdout = StringIO()
+        env_prefix = self.venv_dir.name.rsplit("-py", 1)[0]
+        version = f"{sys.version_info[0]}.{sys.version_info[1]}"
+        current_env = self.poetry_cache / f"{env_prefix}-py{version}"
+        new_env = self.poetry_cache / f"{env_prefix}-py2.7"
+        fs.remove_object(str(self.venv_dir))
+        fs.create_file(current_env / self.activator)
+        fs.create_file(new_env / self.activator)
+        os.utime(current_env, (1, 1))
+
+        assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
+        assert stdout.getvalue() == f". '{new_env / self.activator}'"
+
     @pytest.mark.parametrize(
         "pyproject_toml",
         [
@@ -217,6 +279,7 @@ class PoetryTester(abc.ABC):
                 "[tool.black]\n"
                 'name = "python_project"\n'
             ),
+            '[project.urls]\nname = "python_project"',
         ],
     )
     def test_nothing_happens_given_name_cannot_be_parsed_from_pyproject(
@@ -229,6 +292,49 @@ class PoetryTester(abc.ABC):
         assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
         assert not stdout.getvalue()
 
+    def test_activates_given_long_project_name_with_special_chars(self, fs):
+        stdout = StringIO()
+        name = "Python Project!" * 4
+        (self.python_proj / "pyproject.toml").write_text(
+            f'[tool.poetry]\nname = "{name}"\n',
+        )
+        env_name = self.venv_dir.name.replace(
+            "python_project",
+            "python_project_" * 2 + "python_proje",
+        )
+        venv_dir = self.poetry_cache / env_name
+        fs.create_file(venv_dir / self.activator)
+
+        assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
+        assert stdout.getvalue() == f". '{venv_dir / self.activator}'"
+
+    @pytest.mark.parametrize(
+        "pyproject_toml",
+        [
+            '[project]\nname = "python_project"\n',
+            '  [project]  \r\nversion = "0.2.0"\r\nname = "python_project"',
+            (
+                "[project]\n"
+                'name = "python_project"\n'
+                "\n"
+                "[tool.poetry]\n"
+                'name = "not_this_one"\n'
+            ),
+            (
+                "[tool.poetry.dependencies]\n"
+                'name = "not_this_one"\n'
+                "[tool.poetry]\n"
+                'name = "python_project"\n'
+            ),
+        ],
+    )
+    def test_activates_given_name_parsed_from_pyproject(self, pyproject_toml):
+        assert (self.python_proj / "pyproject.toml").write_text(pyproject_toml)
+        stdout = StringIO()
+
+        assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
+        assert stdout.getvalue() == f". '{self.venv_dir / self.activator}'"
+
     def test_nothing_happens_given_pyproject_toml_does_not_exist(self, fs):
         fs.remove(self.python_proj / "pyproject.toml")
         stdout = StringIO()
@@ -292,6 +398,24 @@ class PoetryLinuxTester(PoetryTester):
         root_dir() / "home" / "user" / ".cache" / "pypoetry" / "virtualenvs"
     )
 
+    def test_xdg_cache_home_used_if_set(self, fs):
+        stdout = StringIO()
+        xdg_cache = root_dir() / "xdg_cache"
+        venv_dir = xdg_cache / "pypoetry" / "virtualenvs" / self.venv_dir.name
+        fs.remove_object(str(self.venv_dir))
+        fs.create_file(venv_dir / self.activator)
+        os.environ["XDG_CACHE_HOME"] = str(xdg_cache)
+
+        assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
+        assert stdout.getvalue() == f". '{venv_dir / self.activator}'"
+
+    def test_xdg_cache_home_ignored_if_set_but_empty(self):
+        stdout = StringIO()
+        os.environ["XDG_CACHE_HOME"] = ""
+
+        assert pyautoenv.main([str(self.python_proj), self.flag], stdout) == 0
+        assert stdout.getvalue() == f". '{self.venv_dir / self.activator}'"
+
 
 class TestPoetryBashLinux(PoetryLinuxTester):
     activator = Path("bin/activate")
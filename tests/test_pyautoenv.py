@@ -13,6 +13,7 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import hashlib
 import os
 import re
 from io import StringIO
@@ -24,6 +25,9 @@ import pytest
 import pyautoenv
 from tests.tools import root_dir
 
+HELP_PATTERN = re.compile(r"usage: pyautoenv(.py)? .*\n")
+VERSION_PATTERN = re.compile(r"pyautoenv [0-9]+\.[0-9]+\.[0-9](\.\w+)?\n")
+
 
 def test_main_does_nothing_given_directory_does_not_exist():
     stdout = StringIO()
@@ -32,6 +36,15 @@ def test_main_does_nothing_given_directory_does_not_exist():
     assert not stdout.getvalue()
 
 
+@pytest.fixture()
+def _clear_operating_system_cache():
+    """Reset the memoised operating system before and after the test."""
+    pyautoenv.operating_system.cache_clear()
+    yield
+    pyautoenv.operating_system.cache_clear()
+
+
+@pytest.mark.usefixtures("_clear_operating_system_cache")
 @pytest.mark.parametrize(
     ("os_name", "enum_value"),
     [
@@ -45,12 +58,15 @@ def test_operating_system_returns_enum_based_on_sys_platform(
     os_name,
     enum_value,
 ):
-    pyautoenv.operating_system.cache_clear()
-
     with mock.patch("pyautoenv.sys.platform", new=os_name):
         assert pyautoenv.operating_system() == enum_value
 
 
+@pytest.mark.parametrize("data", [b"", b"abc", b"/home/user/python_project"])
+def test_sha256_digest_matches_hashlib(data):
+    assert pyautoenv.sha256_digest(data) == hashlib.sha256(data).digest()
+
+
 class TestParseArgs:
     def setup_method(self):
         self.stdout = StringIO()
@@ -69,12 +85,18 @@ class TestParseArgs:
 
     @pytest.mark.parametrize(
         "args",
-        [["-h"], ["--help"], ["abc", "--help"], ["-V", "--help"]],
+        [
+            ["-h"],
+            ["--help"],
+            ["abc", "--help"],
+            ["-V", "--help"],
+            ["a", "b", "--fish", "--pwsh", "-h"],
+        ],
     )
     def test_help_prints_help_and_exits(self, args):
         with pytest.raises(SystemExit) as sys_exit:
             pyautoenv.parse_args(args, self.stdout)
-        assert re.match(r"usage: pyautoenv(.py)? .*\n", self.stdout.getvalue())
+        assert HELP_PATTERN.match(self.stdout.getvalue())
         assert pyautoenv.__doc__ in self.stdout.getvalue()
         assert sys_exit.value.code == 0
 
@@ -85,8 +107,7 @@ class TestParseArgs:
     def test_version_prints_version_and_exits(self, args):
         with pytest.raises(SystemExit) as sys_exit:
             pyautoenv.parse_args(args, self.stdout)
-        version_pattern = r"pyautoenv [0-9]+\.[0-9]+\.[0-9](\.\w+)?\n"
-        assert re.match(version_pattern, self.stdout.getvalue())
+        assert VERSION_PATTERN.match(self.stdout.getvalue())
         assert sys_exit.value.code == 0
 
     @pytest.mark.parametrize("argv", [[], ["path"]])
@@ -47,15 +47,24 @@ class VenvTester(abc.ABC):
     def activator(self) -> str:
         """The name of the activator script."""
 
+    @classmethod
+    def setup_class(cls):
+        cls.os_patch = mock.patch(OPERATING_SYSTEM, return_value=cls.os)
+        cls.os_patch.start()
+
     def setup_method(self):
         pyautoenv.poetry_cache_dir.cache_clear()
         pyautoenv.ignored_dirs.cache_clear()
-        os.environ = {}  # noqa: B003
-        self.os_patch = mock.patch(OPERATING_SYSTEM, return_value=self.os)
-        self.os_patch.start()
+        pyautoenv.venv_dir_names.cache_clear()
+        self.env_patch = mock.patch.dict(os.environ, {}, clear=True)
+        self.env_patch.start()
 
     def teardown_method(self):
-        self.os_patch.stop()
+        self.env_patch.stop()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.os_patch.stop()
 
     @pytest.fixture(autouse=True)
     def fs(self, fs: FakeFilesystem) -> FakeFilesystem:
@@ -110,6 +119,25 @@ class VenvTester(abc.ABC):
         assert pyautoenv.main(["not_a_venv", self.flag], stdout) == 0
         assert stdout.getvalue() == "deactivate"
 
+    def test_deactivate_and_activate_given_active_venv_does_not_exist(self):
+        stdout = StringIO()
+        activate_venv(root_dir() / "deleted_project" / ".venv")
+
+        assert pyautoenv.main([str(self.PY_PROJ), self.flag], stdout) == 0
+        assert (
+            stdout.getvalue()
+            == f"deactivate && . {self.VENV_DIR / self.activator}"
+        )
+
+    def test_nothing_happens_given_active_venv_is_symlink_to_venv(self, fs):
+        stdout = StringIO()
+        venv_link = root_dir() / "venv_link"
+        fs.create_symlink(venv_link, self.VENV_DIR)
+        activate_venv(venv_link)
+
+        assert pyautoenv.main([str(self.PY_PROJ), self.flag], stdout) == 0
+        assert not stdout.getvalue()
+
     def test_deactivate_and_activate_switching_to_new_venv(self, fs):
         stdout = StringIO()
         new_venv_activate = root_dir() / "pyproj2" / ".venv" / self.activator
@@ -165,6 +193,54 @@ class VenvTester(abc.ABC):
         assert pyautoenv.main([str(self.PY_PROJ), self.flag], stdout) == 0
         assert stdout.getvalue() == f". '{self.VENV_DIR / self.activator}'"
 
+    def test_activates_given_venv_above_git_submodule(self, fs):
+        stdout = StringIO()
+        submodule_dir = self.PY_PROJ / "libs" / "sub"
+        fs.create_file(submodule_dir / ".git")
+        fs.create_dir(submodule_dir / "src")
+
+        assert (
+            pyautoenv.main([str(submodule_dir / "src"), self.flag], stdout)
+            == 0
+        )
+        assert stdout.getvalue() == f". '{self.VENV_DIR / self.activator}'"
+
+    def test_nothing_happens_given_venv_active_and_cd_to_git_submodule(
+        self,
+        fs,
+    ):
+        stdout = StringIO()
+        submodule_dir = self.PY_PROJ / "libs" / "sub"
+        fs.create_file(submodule_dir / ".git")
+        fs.create_dir(submodule_dir / "src")
+        activate_venv(self.VENV_DIR)
+
+        assert (
+            pyautoenv.main([str(submodule_dir / "src"), self.flag], stdout)
+            == 0
+        )
+        assert not stdout.getvalue()
+
+    def test_nothing_happens_given_venv_above_home_directory(self, fs):
+        stdout = StringIO()
+        home_dir = self.PY_PROJ / "home"
+        fs.create_dir(home_dir / "src")
+        os.environ["HOME"] = str(home_dir)
+        os.environ["USERPROFILE"] = str(home_dir)
+
+        assert pyautoenv.main([str(home_dir / "src"), self.flag], stdout) == 0
+        assert not stdout.getvalue()
+
+    def test_activates_given_venv_in_home_directory(self):
+        stdout = StringIO()
+        os.environ["HOME"] = str(self.PY_PROJ)
+        os.environ["USERPROFILE"] = str(self.PY_PROJ)
+
+        assert (
+            pyautoenv.main([str(self.PY_PROJ / "src"), self.flag], stdout) == 0
+        )
+        assert stdout.getvalue() == f". '{self.VENV_DIR / self.activator}'"
+
     def test_nothing_happens_given_changing_to_ignored_directory(self):
         stdout = StringIO()
         ignore = f"some_dir;{self.PY_PROJ.resolve()}"
@@ -183,6 +259,32 @@ class VenvTester(abc.ABC):
         )
         assert not stdout.getvalue()
 
+    def test_nothing_happens_given_venv_in_child_of_ignored_directory(
+        self,
+        fs,
+    ):
+        stdout = StringIO()
+        fs.create_file(self.PY_PROJ / "src" / ".venv" / self.activator)
+        ignore = f"some_dir;{self.PY_PROJ.resolve()}"
+        os.environ[pyautoenv.IGNORE_DIRS] = ignore
+
+        assert (
+            pyautoenv.main([str(self.PY_PROJ / "src"), self.flag], stdout) == 0
+        )
+        assert not stdout.getvalue()
+
+    def test_activates_given_sibling_with_ignored_directory_as_prefix(
+        self,
+        fs,
+    ):
+        stdout = StringIO()
+        sibling = Path(f"{self.PY_PROJ}_2")
+        fs.create_file(sibling / ".venv" / self.activator)
+        os.environ[pyautoenv.IGNORE_DIRS] = str(self.PY_PROJ.resolve())
+
+        assert pyautoenv.main([str(sibling), self.flag], stdout) == 0
+        assert stdout.getvalue() == f". '{sibling / '.venv' / self.activator}'"
+
     def test_deactivate_given_changing_to_ignored_directory(self):
         stdout = StringIO()
         activate_venv(self.VENV_DIR)
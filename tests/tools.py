@@ -22,6 +22,27 @@ from typing import Union
 from pyfakefs.fake_filesystem import FakeFilesystem
 
 OPERATING_SYSTEM = "pyautoenv.operating_system"
+PYPROJECT_TOML = (
+    "[build-system]\n"
+    'requires = ["poetry-core>=1.0.0"]\n'
+    'build-backend = "poetry.core.masonry.api"\n'
+    "\n"
+    "[tool.poetry]\n"
+    "# comment\n"
+    'names = "not this one!"\n'
+    'name = "{name}"\n'
+    'version = "0.2.0"\n'
+    "some_list = [\n"
+    "    'val1',\n"
+    "    'val2',\n"
+    "]\n"
+    "\n"
+    "[tool.ruff]\n"
+    "select = [\n"
+    '    "F",\n'
+    '    "W",\n'
+    "]\n"
+)
 
 
 def activate_venv(venv_dir: Union[str, Path]) -> None:
@@ -36,26 +57,9 @@ def make_poetry_project(
 ) -> FakeFilesystem:
     """Create a poetry project on the given file system."""
     fs.create_file(path / "poetry.lock")
-    fs.create_file(path / "pyproject.toml").set_contents(
-        "[build-system]\n"
-        'requires = ["poetry-core>=1.0.0"]\n'
-        'build-backend = "poetry.core.masonry.api"\n'
-        "\n"
-        "[tool.poetry]\n"
-        "# comment\n"
-        'names = "not this one!"\n'
-        f'name = "{name}"\n'
-        'version = "0.2.0"\n'
-        "some_list = [\n"
-        "    'val1',\n"
-        "    'val2',\n"
-        "]\n"
-        "\n"
-        "[tool.ruff]\n"
-        "select = [\n"
-        '    "F",\n'
-        '    "W",\n'
-        "]\n",
+    fs.create_file(
+        path / "pyproject.toml",
+        contents=PYPROJECT_TOML.format(name=name),
     )
     return fs
 